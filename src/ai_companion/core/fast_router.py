@@ -0,0 +1,38 @@
+import re
+from typing import Optional
+
+# Tags added by the interfaces when the user sends us an image; those always get a conversational reply
+USER_IMAGE_TAGS = ("[USER_SENT_IMAGE]", "[Image Analysis:")
+
+# Explicit generation requests from ROUTER_PROMPT, anchored to the start of the message so a
+# request mentioned mid-sentence ("I told her to send me a photo") is left to the LLM router
+_REQUEST_PREFIX = r"^\s*(?:(?:can|could|will|would) you |please |pls |plz )?(?:please )?"
+IMAGE_REQUEST = re.compile(
+    _REQUEST_PREFIX
+    + r"(?:send me an? (?:photo|pic|picture|selfie)|(?:generate|create|make) (?:me )?an image"
+    r"|show me an? (?:photo|pic|picture)|draw me\b|draw (?:a|an) (?:picture|sketch|image|drawing) of)",
+    re.IGNORECASE,
+)
+AUDIO_REQUEST = re.compile(
+    _REQUEST_PREFIX + r"(?:send me (?:a )?(?:voice (?:message|note)|audio)|voice (?:message|note) please)",
+    re.IGNORECASE,
+)
+# Negated or quoted requests ("don't send me a voice note", "she said 'send me a pic'") go to the LLM
+_NEGATION = re.compile(r"(?i)\b(?:don['’]?t|do not|never|no need|stop)\b")
+_QUOTE = re.compile(r"[\"“”«»]")
+
+
+def fast_router(content: str) -> Optional[str]:
+    """Resolve the workflow for messages that match the router's explicit rules.
+
+    Returns None when the message needs the LLM router to decide.
+    """
+    if any(tag in content for tag in USER_IMAGE_TAGS):
+        return "conversation"
+    if _NEGATION.search(content) or _QUOTE.search(content):
+        return None
+    if IMAGE_REQUEST.search(content):
+        return "image"
+    if AUDIO_REQUEST.search(content):
+        return "audio"
+    return None
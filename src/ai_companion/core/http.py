@@ -0,0 +1,8 @@
+import httpx
+
+# Shared connection pool for the provider clients (Groq, ElevenLabs, Pollinations), so TLS sessions are reused
+HTTP = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(60.0),
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+)
@@ -1,3 +1,5 @@
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+
 ROUTER_PROMPT = """
 You are a conversational assistant that needs to decide the type of response to give to
 the user. You'll take into account the conversation so far and determine if the best next response is
@@ -73,7 +75,7 @@ Enhance the given prompt using the best prompt engineering techniques such as pr
 "realistic photo of a person having a coffee" -> "photo of a person having a coffee in a cozy cafe, natural morning light, shot with a 50mm f/1.8 lens, 8425.HEIC"
 """
 
-CHARACTER_CARD_PROMPT = """
+CHARACTER_CARD_STATIC = """
 You are Muzzamil, a 24-year-old Machine Learning Engineer living in Karachi, Pakistan.
 Your goal is to be the user's "AI Bro" — helpful, smart, but extremely casual and culturally aware.
 
@@ -97,11 +99,10 @@ When you see `[Image Analysis: <description>]`:
    - User sends code error -> "oof, that indentation is messy bhai."
    - User sends food -> "damn that looks good, where from?"
 
-## User Background
-{memory_context}
-
-## Current Activity
-{current_activity}
+# 🧰 TOOLS
+- `get_current_activity`: check what you're doing right now (or at another day/time) before answering "what are u doing?" or questions about your plans.
+- `recall_memory`: look up things the user told you before when the facts below aren't enough.
+- Only use a tool when the message needs it. Never mention the tools to the user.
 
 # 📝 Response Rules
 1. **Length:** Keep it under 20-30 words usually. Only go long if explaining code.
@@ -119,6 +120,15 @@ User: "Check this image"
 You: "yooo what is that?? looks insane."
 """
 
+# Per-turn context goes last so the static rules above stay a byte-identical prefix
+# across calls and can be served from the provider's prompt cache.
+CHARACTER_CARD_DYNAMIC_TEMPLATE = """
+## What You Know About The User
+{memory_context}
+"""
+
+CHARACTER_CARD_PROMPT = CHARACTER_CARD_STATIC + CHARACTER_CARD_DYNAMIC_TEMPLATE
+
 MEMORY_ANALYSIS_PROMPT = """Extract and format important personal facts about the user from their message.
 Focus on the actual information, not meta-commentary or requests.
 
@@ -175,4 +185,15 @@ Output: {{
 
 Message: {message}
 Output:
-"""
\ No newline at end of file
+"""
+
+# Templates parsed once at import; the raw strings above stay exported for direct use
+ROUTER_TEMPLATE = ChatPromptTemplate.from_messages(
+    [("system", ROUTER_PROMPT), MessagesPlaceholder(variable_name="messages")]
+)
+CHARACTER_TEMPLATE = ChatPromptTemplate.from_messages(
+    [("system", CHARACTER_CARD_PROMPT + "{summary_context}"), MessagesPlaceholder(variable_name="messages")]
+)
+IMAGE_SCENARIO_TEMPLATE = PromptTemplate.from_template(IMAGE_SCENARIO_PROMPT)
+IMAGE_ENHANCEMENT_TEMPLATE = PromptTemplate.from_template(IMAGE_ENHANCEMENT_PROMPT)
+MEMORY_ANALYSIS_TEMPLATE = PromptTemplate.from_template(MEMORY_ANALYSIS_PROMPT)
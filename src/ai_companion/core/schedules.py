@@ -23,4 +23,12 @@ TUESDAY_SCHEDULE = {
     "13:30-17:00": "Writing documentation (the boring part of coding).",
     "17:00-19:00": "Grocery run at Chase Up. Complaining about inflation.",
     "19:00-21:00": "Online course on Agentic Workflows. Learning new frameworks.",
-    "21:00-22:00": "Video call with a client from the US, pretending the internet connection
\ No newline at end of file
+}
+
+# The rest of the week was lost when this file was truncated. These stay empty until the
+# real schedules are restored, so lookups on those days report no activity.
+WEDNESDAY_SCHEDULE = {}
+THURSDAY_SCHEDULE = {}
+FRIDAY_SCHEDULE = {}
+SATURDAY_SCHEDULE = {}
+SUNDAY_SCHEDULE = {}
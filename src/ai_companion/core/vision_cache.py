@@ -0,0 +1,54 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from ai_companion.settings import settings
+
+if TYPE_CHECKING:
+    from ai_companion.modules.image import ImageToText
+
+
+class VisionCache:
+    """In-memory LRU of image descriptions keyed by image content and prompt, with a TTL."""
+
+    def __init__(self, ttl: int, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def key(image_bytes: bytes, prompt: str) -> str:
+        image_hash = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
+        return f"{image_hash}:{prompt_hash}"
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, description = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return description
+
+    def set(self, key: str, description: str) -> None:
+        self._entries[key] = (time.monotonic(), description)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+vision_cache = VisionCache(ttl=settings.VISION_CACHE_TTL, max_entries=settings.VISION_CACHE_MAX_ENTRIES)
+
+
+async def cached_analyze_image(image_to_text: "ImageToText", image_bytes: bytes, prompt: str = "") -> str:
+    """Analyze an image, reusing the description if the same image and prompt were seen recently."""
+    key = vision_cache.key(image_bytes, prompt)
+    description = vision_cache.get(key)
+    if description is None:
+        description = await image_to_text.analyze_image(image_bytes, prompt=prompt)
+        vision_cache.set(key, description)
+    return description
@@ -8,7 +8,6 @@ from ai_companion.graph.edges import (
 )
 from ai_companion.graph.nodes import (
     audio_node,
-    context_injection_node,
     conversation_node,
     image_node,
     memory_extraction_node,
@@ -26,7 +25,6 @@ def create_workflow_graph():
     # Add all nodes
     graph_builder.add_node("memory_extraction_node", memory_extraction_node)
     graph_builder.add_node("router_node", router_node)
-    graph_builder.add_node("context_injection_node", context_injection_node)
     graph_builder.add_node("memory_injection_node", memory_injection_node)
     graph_builder.add_node("conversation_node", conversation_node)
     graph_builder.add_node("image_node", image_node)
@@ -40,9 +38,8 @@ def create_workflow_graph():
     # Then determine response type
     graph_builder.add_edge("memory_extraction_node", "router_node")
 
-    # Then inject both context and memories
-    graph_builder.add_edge("router_node", "context_injection_node")
-    graph_builder.add_edge("context_injection_node", "memory_injection_node")
+    # Then inject memories (the schedule is looked up on demand through the character tools)
+    graph_builder.add_edge("router_node", "memory_injection_node")
 
     # Then proceed to appropriate response node
     graph_builder.add_conditional_edges("memory_injection_node", select_workflow)
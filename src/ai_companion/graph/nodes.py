@@ -1,9 +1,12 @@
+import asyncio
+import logging
 import os
 from uuid import uuid4
 
 from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
 from langchain_core.runnables import RunnableConfig
 
+from ai_companion.core.fast_router import fast_router
 from ai_companion.graph.state import AICompanionState
 from ai_companion.graph.utils.chains import (
     get_character_response_chain,
@@ -14,28 +17,45 @@ from ai_companion.graph.utils.helpers import (
     get_text_to_image_module,
     get_text_to_speech_module,
 )
+from ai_companion.graph.utils.router_cache import get_router_cache
 from ai_companion.modules.memory.long_term.memory_manager import get_memory_manager
-from ai_companion.modules.schedules.context_generation import ScheduleContextGenerator
 from ai_companion.settings import settings
 
+logger = logging.getLogger(__name__)
+
+
 # which workflow will follow - audio , image , conversation
 async def router_node(state: AICompanionState):
+    last_message = state["messages"][-1]
+    content = last_message.content if last_message.type == "human" and isinstance(last_message.content, str) else ""
+    router_cache = get_router_cache()
+    embedding = None
+
+    if content:
+        # Explicit keywords and image tags are decided without any model call
+        workflow = fast_router(content)
+        if workflow:
+            return {"workflow": workflow}
+
+    cache_key = router_cache.key_for(state["messages"])
+    if cache_key:
+        try:
+            workflow, embedding = await router_cache.lookup(cache_key)
+        except Exception as e:
+            logger.warning("Router cache lookup failed: %s", e)
+            workflow = None
+        if workflow:
+            return {"workflow": workflow}
+
     chain = get_router_chain()
     response = await chain.ainvoke({"messages": state["messages"][-settings.ROUTER_MESSAGES_TO_ANALYZE :]})
-    return {"workflow": response.response_type}
 
-
-def context_injection_node(state: AICompanionState):
-    schedule_context = ScheduleContextGenerator.get_current_activity()
-    if schedule_context != state.get("current_activity", ""):
-        apply_activity = True
-    else:
-        apply_activity = False
-    return {"apply_activity": apply_activity, "current_activity": schedule_context}
+    if embedding is not None:
+        await asyncio.to_thread(router_cache.add, cache_key, embedding, response.response_type)
+    return {"workflow": response.response_type}
 
 
 async def conversation_node(state: AICompanionState, config: RunnableConfig):
-    current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
 
     chain = get_character_response_chain(state.get("summary", ""))
@@ -43,7 +63,6 @@ async def conversation_node(state: AICompanionState, config: RunnableConfig):
     response = await chain.ainvoke(
         {
             "messages": state["messages"],
-            "current_activity": current_activity,
             "memory_context": memory_context,
         },
         config,
@@ -52,16 +71,20 @@ async def conversation_node(state: AICompanionState, config: RunnableConfig):
 
 
 async def image_node(state: AICompanionState, config: RunnableConfig):
-    current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
 
     chain = get_character_response_chain(state.get("summary", ""))
     text_to_image_module = get_text_to_image_module()
 
-    scenario = await text_to_image_module.create_scenario(state["messages"][-5:])
+    # Open the connection to the image API while the scenario LLM call runs
+    scenario, _ = await asyncio.gather(
+        text_to_image_module.create_scenario(state["messages"][-5:]),
+        text_to_image_module.warm_up(),
+    )
     os.makedirs("generated_images", exist_ok=True)
     img_path = f"generated_images/image_{str(uuid4())}.png"
-    await text_to_image_module.generate_image(scenario.image_prompt, img_path)
+    # create_scenario already writes a generation-ready prompt, no need for a second LLM pass
+    await text_to_image_module.generate_image(scenario.image_prompt, img_path, skip_enhance=True)
 
     # Inject the image prompt information as an AI message
     # FIXED: Added system confirmation so AI knows it generated the image
@@ -71,7 +94,6 @@ async def image_node(state: AICompanionState, config: RunnableConfig):
     response = await chain.ainvoke(
         {
             "messages": updated_messages,
-            "current_activity": current_activity,
             "memory_context": memory_context,
         },
         config,
@@ -81,7 +103,6 @@ async def image_node(state: AICompanionState, config: RunnableConfig):
 
 
 async def audio_node(state: AICompanionState, config: RunnableConfig):
-    current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
 
     chain = get_character_response_chain(state.get("summary", ""))
@@ -90,7 +111,6 @@ async def audio_node(state: AICompanionState, config: RunnableConfig):
     response = await chain.ainvoke(
         {
             "messages": state["messages"],
-            "current_activity": current_activity,
             "memory_context": memory_context,
         },
         config,
@@ -142,13 +162,13 @@ async def memory_extraction_node(state: AICompanionState):
     return {}
 
 
-def memory_injection_node(state: AICompanionState):
+async def memory_injection_node(state: AICompanionState):
     """Retrieve and inject relevant memories into the character card."""
     memory_manager = get_memory_manager()
 
     # Get relevant memories based on recent conversation
     recent_context = " ".join([m.content for m in state["messages"][-3:]])
-    memories = memory_manager.get_relevant_memories(recent_context)
+    memories = await memory_manager.get_relevant_memories(recent_context)
 
     # Format memories for the character card
     memory_context = memory_manager.format_memories_for_prompt(memories)
@@ -11,7 +11,6 @@ class AICompanionState(MessagesState):
             LangChain message type (HumanMessage, AIMessage, etc.)
         workflow (str): The current workflow the AI Companion is in. Can be "conversation", "image", or "audio".
         audio_buffer (bytes): The audio buffer to be used for speech-to-text conversion.
-        current_activity (str): The current activity of Muzz based on the schedule.
         memory_context (str): The context of the memories to be injected into the character card.
     """
 
@@ -19,6 +18,4 @@ class AICompanionState(MessagesState):
     workflow: str
     audio_buffer: bytes
     image_path: str
-    current_activity: str
-    apply_activity: bool
     memory_context: str
@@ -1,8 +1,25 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+import logging
+
+from groq import APIError
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from pydantic import BaseModel, Field
 
-from ai_companion.core.prompts import CHARACTER_CARD_PROMPT, ROUTER_PROMPT
+from ai_companion.core.prompts import CHARACTER_TEMPLATE, ROUTER_TEMPLATE
 from ai_companion.graph.utils.helpers import AsteriskRemovalParser, get_chat_model
+from ai_companion.graph.utils.tools import CHARACTER_TOOLS
+
+logger = logging.getLogger(__name__)
+
+# Tool-calling rounds before the character is made to answer without tools
+MAX_TOOL_ROUNDS = 2
+
+
+def _is_tool_use_failure(e: APIError) -> bool:
+    """Whether Groq rejected the model's tool call, either as a 400 or as an in-stream error."""
+    body = e.body if isinstance(e.body, dict) else {}
+    # Status errors carry the whole response body; streamed errors carry only its "error" object
+    error = body.get("error", body)
+    return (isinstance(error, dict) and error.get("code") == "tool_use_failed") or "tool_use_failed" in str(e)
 
 
 class RouterResponse(BaseModel):
@@ -14,25 +31,41 @@ class RouterResponse(BaseModel):
 def get_router_chain():
     model = get_chat_model(temperature=0.3).with_structured_output(RouterResponse)
 
-    prompt = ChatPromptTemplate.from_messages(
-        [("system", ROUTER_PROMPT), MessagesPlaceholder(variable_name="messages")]
-    )
-
-    return prompt | model
+    return ROUTER_TEMPLATE | model
 
 
 def get_character_response_chain(summary: str = ""):
     model = get_chat_model()
-    system_message = CHARACTER_CARD_PROMPT
+    # The summary goes after the static persona and per-turn context, so every call shares the same cacheable prefix
+    summary_context = f"\n\nSummary of conversation earlier between Muzz and the user: {summary}" if summary else ""
 
-    if summary:
-        system_message += f"\n\nSummary of conversation earlier between Muzz and the user: {summary}"
+    prompt = CHARACTER_TEMPLATE.partial(summary_context=summary_context)
+    tool_chain = prompt | model.bind_tools(CHARACTER_TOOLS)
+    final_chain = prompt | model
+    parser = AsteriskRemovalParser()
+    tools_by_name = {t.name: t for t in CHARACTER_TOOLS}
 
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_message),
-            MessagesPlaceholder(variable_name="messages"),
-        ]
-    )
+    async def respond(inputs: dict, config: RunnableConfig) -> str:
+        """Let the character look up its schedule or memories on demand, then reply."""
+        messages = list(inputs["messages"])
+        try:
+            for _ in range(MAX_TOOL_ROUNDS):
+                response = await tool_chain.ainvoke({**inputs, "messages": messages}, config)
+                if not response.tool_calls:
+                    return parser.parse(response.content)
+
+                messages.append(response)
+                for tool_call in response.tool_calls:
+                    selected_tool = tools_by_name[tool_call["name"]]
+                    messages.append(await selected_tool.ainvoke(tool_call, config))
+        except (KeyError, APIError) as e:
+            # Unknown tool names and Groq's tool_use_failed errors: answer without tools instead of not at all
+            if isinstance(e, APIError) and not _is_tool_use_failure(e):
+                raise
+            logger.warning("Tool calling failed, answering without tools: %s", e)
+            messages = list(inputs["messages"])
+
+        response = await final_chain.ainvoke({**inputs, "messages": messages}, config)
+        return parser.parse(response.content)
 
-    return prompt | model | AsteriskRemovalParser()
+    return RunnableLambda(respond)
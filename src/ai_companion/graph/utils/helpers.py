@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_groq import ChatGroq
@@ -21,6 +22,7 @@ def get_text_to_speech_module():
     return TextToSpeech()
 
 
+@lru_cache
 def get_text_to_image_module():
     return TextToImage()
 
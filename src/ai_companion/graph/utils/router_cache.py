@@ -0,0 +1,166 @@
+import asyncio
+import atexit
+import logging
+import os
+import re
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+
+from ai_companion.modules.memory.long_term.vector_store import get_vector_store
+from ai_companion.settings import settings
+
+logger = logging.getLogger(__name__)
+
+VALID_WORKFLOWS = ("conversation", "image", "audio")
+
+# A media label is only cached when the keyed turn mentions that media. Otherwise the
+# decision came from older messages the key does not cover and must not be replayed
+MEDIA_HINTS = {
+    "image": re.compile(r"(?i)\b(photo|pic|picture|image|selfie|draw|drawing|sketch|paint)"),
+    "audio": re.compile(r"(?i)\b(voice|audio|hear|listen|sing|say it|speak)"),
+}
+
+
+class RouterCache:
+    """Semantic cache of router decisions keyed on the latest user message and the reply it answers.
+
+    Messages tagged with [USER_SENT_IMAGE] never get here: fast_router answers them
+    first. Short messages are never cached since their route depends on the
+    conversation around them.
+    """
+
+    def __init__(self, path: str, threshold: float, max_entries: int, min_words: int, save_every: int) -> None:
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.min_words = min_words
+        self.save_every = save_every
+        self._vectors: Optional[np.ndarray] = None
+        self._labels: Optional[np.ndarray] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def key_for(self, messages: Sequence[BaseMessage]) -> Optional[str]:
+        """Cache key for the latest turn, or None when the turn should not go through the cache.
+
+        The previous AI message is part of the key, so "yes please do that" after "want a pic?"
+        and after "shall we talk later?" are separate entries.
+        """
+        last = messages[-1]
+        if last.type != "human" or not isinstance(last.content, str) or len(last.content.split()) < self.min_words:
+            return None
+
+        previous = messages[-2] if len(messages) > 1 else None
+        if previous is not None and previous.type == "ai" and isinstance(previous.content, str) and previous.content:
+            # User message first, so MiniLM's input truncation only ever cuts the reply
+            return f"{last.content}\n{previous.content}"
+        return last.content
+
+    async def lookup(self, text: str) -> Tuple[Optional[str], np.ndarray]:
+        """Return the cached workflow for the closest message (or None) and the query embedding."""
+        # Shares the memory store's MiniLM, embedding cache and encoder pool
+        embedding = await get_vector_store().aencode(text)
+        return await asyncio.to_thread(self._match, embedding), embedding
+
+    def _match(self, embedding: np.ndarray) -> Optional[str]:
+        with self._lock:
+            vectors, labels = self._vectors, self._labels
+        if vectors is None or not len(vectors):
+            return None
+
+        scores = vectors @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return str(labels[best])
+        return None
+
+    def add(self, text: str, embedding: np.ndarray, workflow: str) -> None:
+        """Record a router decision, persisting the cache every `save_every` additions."""
+        if workflow not in VALID_WORKFLOWS:
+            return
+        hint = MEDIA_HINTS.get(workflow)
+        if hint and not hint.search(text):
+            return
+
+        with self._lock:
+            vectors = self._vectors if self._vectors is not None else np.empty((0, len(embedding)), dtype=np.float32)
+            labels = self._labels if self._labels is not None else np.empty(0, dtype="<U16")
+
+            # Keep the newest entries only
+            self._vectors = np.vstack([vectors, embedding[None, :]])[-self.max_entries :]
+            self._labels = np.append(labels, workflow)[-self.max_entries :]
+            self._pending += 1
+            if self._pending >= self.save_every:
+                self._save()
+
+    def flush(self) -> None:
+        """Persist any additions not yet written to disk."""
+        with self._lock:
+            if self._pending:
+                self._save()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                self._vectors, self._labels = data["vectors"], data["labels"]
+            logger.info("Loaded router cache from %s", self.path)
+        except Exception as e:
+            logger.warning("Could not load router cache from %s: %s", self.path, e)
+
+    def _merged_with_disk(self) -> Tuple[np.ndarray, np.ndarray]:
+        # The WhatsApp and Chainlit processes share this file. Start from whatever is on disk and
+        # append only this process's unsaved entries, so one writer does not wipe out the other's.
+        # Two saves racing between read and rename can still drop one batch, which a cache can afford
+        new_vectors, new_labels = self._vectors[-self._pending :], self._labels[-self._pending :]
+        try:
+            with np.load(self.path) as data:
+                disk_vectors, disk_labels = data["vectors"], data["labels"]
+        except Exception:
+            return self._vectors, self._labels
+        if disk_vectors.shape[1:] != new_vectors.shape[1:]:
+            return self._vectors, self._labels
+        return (
+            np.vstack([disk_vectors, new_vectors])[-self.max_entries :],
+            np.append(disk_labels, new_labels)[-self.max_entries :],
+        )
+
+    def _save(self) -> None:
+        vectors, labels = self._merged_with_disk()
+        directory = os.path.dirname(self.path) or "."
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temp file and swap it in, so readers never see a half-written file
+            with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                np.savez(f, vectors=vectors, labels=labels)
+            os.replace(tmp_path, self.path)
+            # Pick up the other process's entries too
+            self._vectors, self._labels = vectors, labels
+            self._pending = 0
+        except Exception as e:
+            logger.warning("Could not persist router cache to %s: %s", self.path, e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+@lru_cache
+def get_router_cache() -> RouterCache:
+    cache = RouterCache(
+        path=settings.SEMANTIC_CACHE_PATH,
+        threshold=settings.ROUTER_CACHE_THRESHOLD,
+        max_entries=settings.ROUTER_CACHE_MAX_ENTRIES,
+        min_words=settings.ROUTER_CACHE_MIN_WORDS,
+        save_every=settings.ROUTER_CACHE_SAVE_EVERY,
+    )
+    # Both interfaces write only every few additions, so persist the tail on exit
+    atexit.register(cache.flush)
+    return cache
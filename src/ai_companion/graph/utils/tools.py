@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+
+from langchain_core.tools import tool
+
+from ai_companion.modules.memory.long_term.memory_manager import get_memory_manager
+from ai_companion.modules.schedules.context_generation import ScheduleContextGenerator
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+@tool
+def get_current_activity(day: Optional[str] = None, time: Optional[str] = None) -> str:
+    """Look up what Muzzamil is doing. Use it when the user asks what you are doing, or about your plans.
+
+    Args:
+        day: Day of the week, e.g. "monday". Defaults to today.
+        time: Time of day as HH:MM (24h). Defaults to now.
+    """
+    now = datetime.now()
+    weekday = DAYS.index(day.strip().lower()) if day and day.strip().lower() in DAYS else now.weekday()
+    try:
+        at = datetime.strptime(time.strip(), "%H:%M").time() if time else now.time()
+    except ValueError:
+        at = now.time()
+
+    activity = ScheduleContextGenerator.get_activity_at(weekday, at)
+    return activity or "Nothing scheduled, just chilling."
+
+
+@tool
+async def recall_memory(query: str) -> str:
+    """Search what you remember about the user. Use it when you need personal details they shared before.
+
+    Args:
+        query: What to look for, e.g. "user's job" or "favorite food".
+    """
+    memory_manager = get_memory_manager()
+    memories = await memory_manager.get_relevant_memories(query)
+    return memory_manager.format_memories_for_prompt(memories) or "Nothing remembered about that."
+
+
+CHARACTER_TOOLS = [get_current_activity, recall_memory]
@@ -1,5 +1,24 @@
+import logging
+from contextlib import AsyncExitStack
+
 from fastapi import FastAPI
-from ai_companion.interfaces.whatsapp.whatsapp_response import whatsapp_router
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from ai_companion.core.http import HTTP
+from ai_companion.graph import graph_builder
+from ai_companion.interfaces.whatsapp.whatsapp_response import (
+    _HTTP,
+    drain_background_tasks,
+    whatsapp_router,
+)
+from ai_companion.settings import settings
+
+# Configure logging once for the WhatsApp process
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    force=True,
+)
 
 # Create FastAPI app instance
 app = FastAPI(
@@ -11,6 +30,23 @@ app = FastAPI(
 # Include the WhatsApp router
 app.include_router(whatsapp_router)
 
+# Open the checkpointer and compile the graph once for the lifetime of the process
+@app.on_event("startup")
+async def startup():
+    app.state.exit_stack = AsyncExitStack()
+    short_term_memory = await app.state.exit_stack.enter_async_context(
+        AsyncSqliteSaver.from_conn_string(settings.SHORT_TERM_MEMORY_DB_PATH)
+    )
+    app.state.graph = graph_builder.compile(checkpointer=short_term_memory)
+
+# Let in-flight messages finish, then close the checkpointer and pooled connections on shutdown
+@app.on_event("shutdown")
+async def shutdown():
+    await drain_background_tasks()
+    await app.state.exit_stack.aclose()
+    await _HTTP.aclose()
+    await HTTP.aclose()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
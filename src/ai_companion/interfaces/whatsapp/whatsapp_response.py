@@ -1,25 +1,34 @@
+import asyncio
 import logging
 import os
+import re
+import time
+from collections import OrderedDict
 from io import BytesIO
 from typing import Dict, Optional, Union
 
 import httpx
+import orjson
 from fastapi import APIRouter, Request, Response
-from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langchain_core.messages import AIMessageChunk, HumanMessage
 
-from ai_companion.graph import graph_builder
+from ai_companion.core.vision_cache import cached_analyze_image
+from ai_companion.graph.utils.helpers import remove_asterisk_content
 from ai_companion.modules.image import ImageToText
 from ai_companion.modules.speech import SpeechToText, TextToSpeech
-from ai_companion.settings import settings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Credentials are read once at import; both naming conventions from the previous code are supported
+_WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN") or os.getenv("WHATSAPP_API_TOKEN")
+_PHONE_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
+_VERIFY_TOKEN = os.getenv("WHATSAPP_VERIFY_TOKEN") or os.getenv("WEBHOOK_VERIFY_TOKEN")
+
+if not all([_WHATSAPP_TOKEN, _PHONE_ID, _VERIFY_TOKEN]):
+    logger.warning(
+        "Missing WhatsApp configuration: set WHATSAPP_TOKEN, WHATSAPP_PHONE_NUMBER_ID and WHATSAPP_VERIFY_TOKEN"
+    )
+
 # Global module instances
 speech_to_text = SpeechToText()
 text_to_speech = TextToSpeech()
@@ -28,28 +37,54 @@ image_to_text = ImageToText()
 # Router for WhatsApp
 whatsapp_router = APIRouter()
 
+# Streamed replies are sent as separate bubbles at sentence ends, or at a word break once this long
+_SENTENCE_END = re.compile(r"[.!?]\s")
+STREAM_FLUSH_CHARS = 80
+
+# Media download URLs from Meta stay valid for ~5 minutes; remember them a bit less than that
+MEDIA_URL_TTL = 240
+MEDIA_URL_CACHE_SIZE = 512
+
+# Meta retries webhooks it considers unacknowledged; remember recent message IDs to ignore redeliveries
+SEEN_MESSAGE_IDS_SIZE = 1024
+_seen_message_ids: "OrderedDict[str, None]" = OrderedDict()
+
+# Strong references to in-flight message tasks so they aren't garbage collected mid-run
+_background_tasks: "set[asyncio.Task]" = set()
+
+# Shared HTTP/2 client for the Graph API, so TLS connections to Meta are reused across requests
+_HTTP = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(15.0),
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+)
+
 # --- ENHANCED CLIENT CLASS ---
 class WhatsAppClient:
     """Handles Blue Ticks, Reactions, and Media Uploads."""
     
     def __init__(self):
-        # Support both naming conventions from your previous code
-        self.token = os.getenv("WHATSAPP_TOKEN") or os.getenv("WHATSAPP_API_TOKEN")
-        self.phone_id = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
-        self.base_url = f"https://graph.facebook.com/v21.0/{self.phone_id}"
+        self.token = _WHATSAPP_TOKEN
+        self.phone_id = _PHONE_ID
+        self._meta_media_base = "https://graph.facebook.com/v21.0/"
+        self.base_url = f"{self._meta_media_base}{self.phone_id}"
+        self.messages_url = f"{self.base_url}/messages"
+        self.media_url = f"{self.base_url}/media"
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json",
         }
+        self._media_urls: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
 
-    async def mark_as_read(self, message_id: str):
-        """Sends Blue Ticks to the user."""
+    async def send_typing_indicator(self, message_id: str):
+        """Marks the message as read and shows 'typing...' until we reply."""
         payload = {
             "messaging_product": "whatsapp",
             "status": "read",
             "message_id": message_id,
+            "typing_indicator": {"type": "text"},
         }
-        await self._post("messages", payload)
+        await self._post(self.messages_url, payload)
 
     async def send_reaction(self, to: str, message_id: str, emoji: str):
         """Reacts to a message (e.g. 👀, 🤔, ✅)."""
@@ -63,10 +98,12 @@ class WhatsAppClient:
                 "emoji": emoji
             }
         }
-        await self._post("messages", payload)
+        await self._post(self.messages_url, payload)
 
-    async def send_message(self, to: str, content: Union[str, bytes], msg_type: str = "text"):
-        """Sends the actual response (Text/Image/Audio)."""
+    async def send_message(
+        self, to: str, content: Union[str, bytes, bytearray, memoryview, BytesIO], msg_type: str = "text"
+    ):
+        """Sends the actual response (Text/Image/Audio). Media may be bytes, a buffer or a file path."""
         payload = {
             "messaging_product": "whatsapp",
             "to": to,
@@ -75,55 +112,113 @@ class WhatsAppClient:
 
         if msg_type == "text":
             payload["text"] = {"body": content}
-            await self._post("messages", payload)
+            await self._post(self.messages_url, payload)
         
         elif msg_type in ["audio", "image"]:
             mime_type = "audio/mpeg" if msg_type == "audio" else "image/png"
             media_id = await self._upload_media(content, mime_type)
             
             payload[msg_type] = {"id": media_id}
-            await self._post("messages", payload)
+            await self._post(self.messages_url, payload)
 
     async def download_media(self, media_id: str) -> bytes:
         """Downloads audio or images sent by user."""
-        async with httpx.AsyncClient() as client:
-            # 1. Get URL
-            meta_res = await client.get(f"https://graph.facebook.com/v21.0/{media_id}", headers=self.headers)
-            meta_res.raise_for_status()
-            download_url = meta_res.json().get("url")
-            
-            # 2. Download Binary Content
-            media_res = await client.get(download_url, headers=self.headers)
+        # 1. Get URL
+        download_url, cached = await self._resolve_media_url(media_id)
+
+        # 2. Download Binary Content
+        try:
+            return await self._fetch_bytes(download_url)
+        except httpx.HTTPStatusError:
+            if not cached:
+                raise
+            # The remembered URL may have expired early, resolve it again once
+            self._media_urls.pop(media_id, None)
+            download_url, _ = await self._resolve_media_url(media_id)
+            return await self._fetch_bytes(download_url)
+
+    async def _resolve_media_url(self, media_id: str) -> tuple[str, bool]:
+        """Looks up the download URL for a media id, reusing recent lookups. Also says if it was cached."""
+        entry = self._media_urls.get(media_id)
+        if entry and time.monotonic() - entry[0] < MEDIA_URL_TTL:
+            self._media_urls.move_to_end(media_id)
+            return entry[1], True
+
+        meta_res = await _HTTP.get(self._meta_media_base + media_id, headers=self.headers)
+        meta_res.raise_for_status()
+        download_url = meta_res.json()["url"]
+
+        self._media_urls[media_id] = (time.monotonic(), download_url)
+        self._media_urls.move_to_end(media_id)
+        while len(self._media_urls) > MEDIA_URL_CACHE_SIZE:
+            self._media_urls.popitem(last=False)
+        return download_url, False
+
+    async def _fetch_bytes(self, url: str) -> bytes:
+        """Streams a media file from Meta's CDN."""
+        async with _HTTP.stream("GET", url, headers=self.headers) as media_res:
             media_res.raise_for_status()
-            return media_res.content
-
-    async def _upload_media(self, content: bytes, mime_type: str) -> str:
-        """Uploads generated media to WhatsApp."""
-        files = {"file": ("media_file", content, mime_type)}
+            return await media_res.aread()
+
+    async def _upload_media(self, content: Union[BytesIO, bytes, bytearray, memoryview, str], mime_type: str) -> str:
+        """Uploads generated media to WhatsApp, streaming it from a file path or buffer."""
+        if isinstance(content, str):
+            stream = open(content, "rb")
+        elif isinstance(content, BytesIO):
+            stream = content
+            stream.seek(0)
+        else:
+            stream = BytesIO(content)
+
+        files = {"file": ("media_file", stream, mime_type)}
         data = {"messaging_product": "whatsapp", "type": mime_type}
-        
-        async with httpx.AsyncClient() as client:
+
+        try:
             # Note: Do NOT set Content-Type header when uploading files, httpx handles boundaries
-            res = await client.post(
-                f"{self.base_url}/media",
-                headers={"Authorization": self.headers["Authorization"]}, 
+            res = await _HTTP.post(
+                self.media_url,
+                headers={"Authorization": self.headers["Authorization"]},
                 files=files,
                 data=data
             )
-            res.raise_for_status()
-            return res.json()["id"]
-
-    async def _post(self, endpoint: str, json_data: dict):
-        async with httpx.AsyncClient() as client:
-            res = await client.post(f"{self.base_url}/{endpoint}", headers=self.headers, json=json_data)
-            if res.status_code not in [200, 201]:
-                logger.error(f"WhatsApp API Error: {res.text}")
-            return res
+        finally:
+            if isinstance(content, str):
+                stream.close()
+        res.raise_for_status()
+        return res.json()["id"]
+
+    async def _post(self, url: str, json_data: dict):
+        # self.headers already carries Content-Type: application/json
+        res = await _HTTP.post(url, headers=self.headers, content=orjson.dumps(json_data))
+        if res.status_code not in [200, 201]:
+            logger.error("WhatsApp API Error: %s", res.text)
+        return res
 
 # Initialize Client
 wa_client = WhatsAppClient()
 
 
+def _split_ready_text(buffer: str) -> tuple[str, str]:
+    """Split a streaming buffer into text ready to send and the remainder to keep buffering.
+
+    Never cuts inside an *action*, so remove_asterisk_content sees both asterisks in one piece.
+    """
+    # An odd number of asterisks before the cut means an action is still open there
+    boundaries = [m.end() for m in _SENTENCE_END.finditer(buffer) if buffer.count("*", 0, m.end()) % 2 == 0]
+    if boundaries:
+        cut = boundaries[-1]
+        return buffer[:cut].strip(), buffer[cut:]
+
+    if len(buffer) >= STREAM_FLUSH_CHARS:
+        cut = buffer.rfind(" ")
+        while cut > 0 and buffer.count("*", 0, cut) % 2:
+            cut = buffer.rfind(" ", 0, cut)
+        if cut > 0:
+            return buffer[:cut].strip(), buffer[cut + 1 :]
+
+    return "", buffer
+
+
 # --- ROUTE HANDLERS ---
 
 @whatsapp_router.get("/whatsapp_response", operation_id="whatsapp_verification")
@@ -134,23 +229,41 @@ async def whatsapp_verification(request: Request) -> Response:
     token = params.get("hub.verify_token")
     challenge = params.get("hub.challenge")
     
-    # Check both env var names to be safe
-    verify_token = os.getenv("WHATSAPP_VERIFY_TOKEN") or os.getenv("WEBHOOK_VERIFY_TOKEN")
-    
-    if mode == "subscribe" and token == verify_token:
-        logger.info(f"✅ Webhook verified successfully")
+    if mode == "subscribe" and token == _VERIFY_TOKEN:
+        logger.info("✅ Webhook verified successfully")
         return Response(content=challenge, status_code=200)
     
-    logger.warning(f"❌ Verification failed. Got: {token}, Expected: {verify_token}")
+    logger.warning("❌ Verification failed. Got: %s, Expected: %s", token, _VERIFY_TOKEN)
     return Response(content="Verification token mismatch", status_code=403)
 
 
+def _is_duplicate(message_id: str) -> bool:
+    """Record a message ID and report whether it was already seen.
+
+    _process_message forgets the ID again if it fails, so a redelivery gets another attempt.
+    """
+    if message_id in _seen_message_ids:
+        _seen_message_ids.move_to_end(message_id)
+        return True
+    _seen_message_ids[message_id] = None
+    if len(_seen_message_ids) > SEEN_MESSAGE_IDS_SIZE:
+        _seen_message_ids.popitem(last=False)
+    return False
+
+
+async def drain_background_tasks() -> None:
+    """Wait for in-flight messages to finish, used on shutdown."""
+    if _background_tasks:
+        logger.info("Waiting for %d in-flight messages", len(_background_tasks))
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+
 @whatsapp_router.post("/whatsapp_response", operation_id="whatsapp_message_handler")
 async def whatsapp_message_handler(request: Request) -> Response:
-    """Main Logic: Reads -> Reacts -> Thinks -> Responds."""
+    """Acknowledges the webhook right away and processes the message in the background."""
     try:
         data = await request.json()
-        logger.info(f"📥 Received webhook data: {data}")
+        logger.info("📥 Received webhook data: %s", data)
         
         # 1. Validate Payload
         if not data.get("entry") or not data["entry"][0].get("changes"):
@@ -162,99 +275,143 @@ async def whatsapp_message_handler(request: Request) -> Response:
         if "statuses" in change_value:
             return Response(content="Status received", status_code=200)
 
-        # 3. Handle User Messages
-        if "messages" in change_value:
-            message = change_value["messages"][0]
-            from_number = message["from"]
-            message_id = message["id"]
-            session_id = from_number
-            
-            logger.info(f"📱 Msg from {from_number} | Type: {message['type']}")
+        if "messages" not in change_value:
+            return Response(content="No messages found", status_code=200)
 
-            # --- VISUAL FEEDBACK START ---
-            # Mark as Read (Blue Ticks)
-            await wa_client.mark_as_read(message_id)
-            
-            # Set Reaction based on input type
-            start_reaction = "🤔" # Default thinking
-            if message["type"] == "image": start_reaction = "👀" # Looking
-            elif message["type"] == "audio": start_reaction = "👂" # Listening
-            
-            await wa_client.send_reaction(from_number, message_id, start_reaction)
-            # --- VISUAL FEEDBACK END ---
-
-            # 4. Extract Content
-            content = ""
-            if message["type"] == "audio":
-                audio_bytes = await wa_client.download_media(message["audio"]["id"])
-                content = await speech_to_text.transcribe(audio_bytes)
-                logger.info(f"🎤 Transcribed: {content[:30]}...")
-
-            elif message["type"] == "image":
-                user_caption = message.get("image", {}).get("caption", "")
-                user_question = user_caption if user_caption.strip() else "What is this?"
-                
-                # Tag for Router to know it's an image
-                content = f"[USER_SENT_IMAGE] {user_question}"
-                
-                image_bytes = await wa_client.download_media(message["image"]["id"])
-                
-                try:
-                    # Vision Model Analysis
-                    description = await image_to_text.analyze_image(image_bytes, prompt=user_question)
-                    content += f"\n\n[Image Analysis: {description}]"
-                    logger.info("✅ Image analyzed")
-                except Exception as e:
-                    logger.error(f"Vision Error: {e}")
-                    content += "\n\n[Image Analysis: Failed to analyze]"
-
-            elif message["type"] == "text":
-                content = message["text"]["body"]
-
-            else:
-                await wa_client.send_message(from_number, "Sorry, I can't handle this message type yet.")
-                return Response(content="Unsupported type", status_code=200)
-
-            # 5. Invoke LangGraph Agent
-            logger.info("🚀 Invoking Graph...")
-            async with AsyncSqliteSaver.from_conn_string(settings.SHORT_TERM_MEMORY_DB_PATH) as short_term_memory:
-                graph = graph_builder.compile(checkpointer=short_term_memory)
-                
-                await graph.ainvoke(
-                    {"messages": [HumanMessage(content=content)]},
-                    {"configurable": {"thread_id": session_id}},
-                )
-                
-                output_state = await graph.aget_state(config={"configurable": {"thread_id": session_id}})
-
-            # 6. Process Response
-            workflow = output_state.values.get("workflow", "conversation")
-            response_text = output_state.values["messages"][-1].content
+        message_id = change_value["messages"][0]["id"]
+        if _is_duplicate(message_id):
+            logger.info("🔁 Ignoring redelivered message %s", message_id)
+            return Response(content="Duplicate", status_code=200)
+
+        # 3. Hand off to a background task so Meta gets its ACK before the pipeline runs
+        task = asyncio.create_task(_process_message(change_value, request.app.state.graph))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+        return Response(content="Processed", status_code=200)
+
+    except Exception as e:
+        logger.exception("❌ Error processing webhook: %s", e)
+        return Response(content="Internal Error", status_code=500)
+
+
+async def _process_message(change_value: dict, graph) -> None:
+    """Main Logic: Reads -> Reacts -> Thinks -> Responds."""
+    download_task = None
+    message_id = None
+    try:
+        message = change_value["messages"][0]
+        from_number = message["from"]
+        message_id = message["id"]
+        session_id = from_number
+        
+        logger.info("📱 Msg from %s | Type: %s", from_number, message["type"])
+
+        # Start fetching user media right away, it doesn't depend on the feedback calls below
+        if message["type"] in ("audio", "image"):
+            download_task = asyncio.create_task(wa_client.download_media(message[message["type"]]["id"]))
+
+        # --- VISUAL FEEDBACK START ---
+        # Set Reaction based on input type
+        start_reaction = "🤔" # Default thinking
+        if message["type"] == "image": start_reaction = "👀" # Looking
+        elif message["type"] == "audio": start_reaction = "👂" # Listening
+
+        # Mark as Read (Blue Ticks) with typing indicator and react concurrently
+        await asyncio.gather(
+            wa_client.send_typing_indicator(message_id),
+            wa_client.send_reaction(from_number, message_id, start_reaction),
+        )
+        # --- VISUAL FEEDBACK END ---
+
+        # 4. Extract Content
+        content = ""
+        if message["type"] == "audio":
+            audio_bytes = await download_task
+            content = await speech_to_text.transcribe(audio_bytes)
+            logger.info("🎤 Transcribed: %s...", content[:30])
+
+        elif message["type"] == "image":
+            user_caption = message.get("image", {}).get("caption", "")
+            user_question = user_caption if user_caption.strip() else "What is this?"
             
-            if workflow == "audio":
-                audio_buffer = output_state.values["audio_buffer"]
-                await wa_client.send_message(from_number, audio_buffer.getvalue(), "audio")
+            # Tag for Router to know it's an image
+            content = f"[USER_SENT_IMAGE] {user_question}"
             
-            elif workflow == "image":
-                image_path = output_state.values["image_path"]
-                with open(image_path, "rb") as f:
-                    image_data = f.read()
-                await wa_client.send_message(from_number, image_data, "image")
-                # Send caption separately
-                if response_text:
-                    await wa_client.send_message(from_number, response_text, "text")
+            image_bytes = await download_task
             
-            else:
-                # Normal Text Response
+            try:
+                # Vision Model Analysis
+                description = await cached_analyze_image(image_to_text, image_bytes, user_question)
+                content += f"\n\n[Image Analysis: {description}]"
+                logger.info("✅ Image analyzed")
+            except Exception as e:
+                logger.error("Vision Error: %s", e)
+                content += "\n\n[Image Analysis: Failed to analyze]"
+
+        elif message["type"] == "text":
+            content = message["text"]["body"]
+
+        else:
+            await wa_client.send_message(from_number, "Sorry, I can't handle this message type yet.")
+            return
+
+        # 5. Invoke LangGraph Agent
+        logger.info("🚀 Invoking Graph...")
+
+        # Text replies are forwarded sentence by sentence while the model is still generating
+        buffer = ""
+        streamed = False
+        async for chunk, metadata in graph.astream(
+            {"messages": [HumanMessage(content=content)]},
+            {"configurable": {"thread_id": session_id}},
+            stream_mode="messages",
+        ):
+            if metadata["langgraph_node"] == "conversation_node" and isinstance(chunk, AIMessageChunk):
+                buffer += chunk.content
+                ready, buffer = _split_ready_text(buffer)
+                ready = remove_asterisk_content(ready)
+                if ready:
+                    await wa_client.send_message(from_number, ready, "text")
+                    streamed = True
+
+        output_state = await graph.aget_state(config={"configurable": {"thread_id": session_id}})
+
+        # 6. Process Response
+        workflow = output_state.values.get("workflow", "conversation")
+        response_text = output_state.values["messages"][-1].content
+        
+        if workflow == "audio":
+            # Hand the buffer over as-is; _upload_media streams it without copying it out first
+            audio_buffer = output_state.values["audio_buffer"]
+            await wa_client.send_message(from_number, audio_buffer, "audio")
+        
+        elif workflow == "image":
+            image_path = output_state.values["image_path"]
+            await wa_client.send_message(from_number, image_path, "image")
+            # Send caption separately
+            if response_text:
                 await wa_client.send_message(from_number, response_text, "text")
+        
+        elif streamed:
+            # Flush whatever is left after the last sentence break
+            tail = remove_asterisk_content(buffer)
+            if tail:
+                await wa_client.send_message(from_number, tail, "text")
 
-            # 7. Final Reaction (Success)
-            await wa_client.send_reaction(from_number, message_id, "✅")
-
-            return Response(content="Processed", status_code=200)
+        else:
+            # Normal Text Response
+            await wa_client.send_message(from_number, response_text, "text")
 
-        return Response(content="No messages found", status_code=200)
+        # 7. Final Reaction (Success)
+        await wa_client.send_reaction(from_number, message_id, "✅")
 
     except Exception as e:
-        logger.exception(f"❌ Error processing webhook: {e}")
-        return Response(content="Internal Error", status_code=500)
\ No newline at end of file
+        logger.exception("❌ Error processing message: %s", e)
+        # This attempt did not answer the message, so let Meta's redelivery of it through
+        if message_id is not None:
+            _seen_message_ids.pop(message_id, None)
+    finally:
+        # Don't leave the media download running (or its error unretrieved) if we bailed out early
+        if download_task is not None and not download_task.done():
+            download_task.cancel()
@@ -1,14 +1,23 @@
-import base64
 import io
 import logging
 import os
 from typing import Optional, Union
 
-from PIL import Image
+from PIL import Image, features
+
+try:
+    # SIMD-accelerated codec that also returns str directly, skipping the extra decode copy
+    from pybase64 import b64encode_as_string
+except ImportError:
+    import base64
+
+    def b64encode_as_string(data: bytes) -> str:
+        return base64.b64encode(data).decode("ascii")
 
 from ai_companion.core.exceptions import ImageToTextError
+from ai_companion.core.http import HTTP
 from ai_companion.settings import settings
-from groq import Groq
+from groq import AsyncGroq
 
 class ImageToText:
     """A class to handle image-to-text conversion using Groq's vision capabilities."""
@@ -18,8 +27,10 @@ class ImageToText:
     def __init__(self):
         """Initialize the ImageToText class and validate environment variables."""
         self._validate_env_vars()
-        self._client: Optional[Groq] = None
+        self._client: Optional[AsyncGroq] = None
         self.logger = logging.getLogger(__name__)
+        if not features.check_feature("libjpeg_turbo"):
+            self.logger.warning("⚠️ Pillow is not linked against libjpeg-turbo, JPEG processing will be slow")
 
     def _validate_env_vars(self) -> None:
         """Validate that all required environment variables are set."""
@@ -28,10 +39,10 @@ class ImageToText:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
     @property
-    def client(self) -> Groq:
+    def client(self) -> AsyncGroq:
         """Get or create Groq client instance using singleton pattern."""
         if self._client is None:
-            self._client = Groq(api_key=settings.GROQ_API_KEY)
+            self._client = AsyncGroq(api_key=settings.GROQ_API_KEY, http_client=HTTP)
         return self._client
 
     async def analyze_image(self, image_data: Union[str, bytes], prompt: str = "") -> str:
@@ -66,41 +77,51 @@ class ImageToText:
             self.logger.info(f"📊 Original image size: {len(image_bytes)} bytes")
 
             # Process image with PIL to ensure compatibility
+            max_size = 1024
             try:
+                # Opening only parses the header; pixels are decoded lazily
                 img = Image.open(io.BytesIO(image_bytes))
-                
-                # Convert to RGB if needed (e.g. for PNGs with transparency or RGBA images)
-                if img.mode in ('RGBA', 'P', 'LA'):
-                    self.logger.info(f"🔄 Converting image from {img.mode} to RGB")
-                    # Create white background for transparency
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Resize if too large (max 1024 on longest side for better performance)
-                max_size = 1024
-                if max(img.size) > max_size:
-                    ratio = max_size / max(img.size)
-                    new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    self.logger.info(f"📉 Resized image from {img.size} to {new_size}")
-
-                # Convert to JPEG bytes
-                output_buffer = io.BytesIO()
-                img.save(output_buffer, format="JPEG", quality=90)
-                image_bytes = output_buffer.getvalue()
-                self.logger.info(f"✅ Processed image: {len(image_bytes)} bytes")
+
+                if img.format == "JPEG" and img.mode == "RGB" and max(img.size) <= max_size:
+                    # Already what the vision model expects, skip the decode/re-encode round trip
+                    self.logger.info(f"✅ Using original JPEG ({img.size[0]}x{img.size[1]})")
+                else:
+                    # Let libjpeg scale down by 1/2, 1/4 or 1/8 while decoding (no-op for other formats)
+                    img.draft("RGB", (max_size, max_size))
+
+                    # Convert to RGB if needed (e.g. for PNGs with transparency or RGBA images)
+                    if img.mode in ('RGBA', 'P', 'LA'):
+                        self.logger.info(f"🔄 Converting image from {img.mode} to RGB")
+                        # Create white background for transparency
+                        background = Image.new('RGB', img.size, (255, 255, 255))
+                        if img.mode == 'P':
+                            img = img.convert('RGBA')
+                        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                        img = background
+                    elif img.mode != 'RGB':
+                        img = img.convert('RGB')
+
+                    # Resize if still too large (max 1024 on longest side for better performance)
+                    if max(img.size) > max_size:
+                        ratio = max_size / max(img.size)
+                        new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
+                        # After draft() the remaining scale is usually mild, where a cheaper filter looks the same
+                        resample = Image.Resampling.HAMMING if ratio >= 0.5 else Image.Resampling.LANCZOS
+                        self.logger.info(f"📉 Resizing image from {img.size} to {new_size}")
+                        img = img.resize(new_size, resample)
+
+                    # Convert to JPEG bytes
+                    output_buffer = io.BytesIO()
+                    img.save(output_buffer, format="JPEG", quality=90)
+                    image_bytes = output_buffer.getvalue()
+                    self.logger.info(f"✅ Processed image: {len(image_bytes)} bytes")
                 
             except Exception as e:
                 self.logger.warning(f"⚠️ Failed to process image with PIL: {e}. Using original bytes.")
                 # Continue with original bytes if PIL processing fails
 
             # Convert image to base64
-            base64_image = base64.b64encode(image_bytes).decode("utf-8")
+            base64_image = b64encode_as_string(image_bytes)
 
             # Improved default prompt with better instructions
             if not prompt:
@@ -132,7 +153,7 @@ Provide a clear, descriptive response in a conversational tone."""
 
             # Make the API call with better parameters
             self.logger.info(f"🚀 Calling vision model: {settings.ITT_MODEL_NAME}")
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=settings.ITT_MODEL_NAME,
                 messages=messages,
                 max_tokens=1500,
@@ -1,15 +1,17 @@
+import asyncio
 import logging
 import os
 import urllib.parse
 from typing import Optional
 
+import anyio
 import httpx
 from pydantic import BaseModel, Field
 
 from ai_companion.core.exceptions import TextToImageError
-from ai_companion.core.prompts import IMAGE_ENHANCEMENT_PROMPT, IMAGE_SCENARIO_PROMPT
+from ai_companion.core.http import HTTP
+from ai_companion.core.prompts import IMAGE_ENHANCEMENT_TEMPLATE, IMAGE_SCENARIO_TEMPLATE
 from ai_companion.settings import settings
-from langchain.prompts import PromptTemplate
 from langchain_groq import ChatGroq
 
 
@@ -33,12 +35,32 @@ class TextToImage:
     """A class to handle text-to-image generation using FREE Pollinations.ai API."""
 
     REQUIRED_ENV_VARS = ["GROQ_API_KEY"]
+    # Prompts this long that already carry style keywords don't gain anything from enhancement
+    DETAILED_PROMPT_MIN_CHARS = 80
+    DETAILED_PROMPT_KEYWORDS = ("detailed", "4k", "cinematic", "photoreal")
 
     def __init__(self):
         """Initialize the TextToImage class and validate environment variables."""
         self._validate_env_vars()
         self.logger = logging.getLogger(__name__)
-        self.api_url = "https://image.pollinations.ai/prompt"
+        self.base_url = "https://image.pollinations.ai/"
+        self.api_url = f"{self.base_url}prompt"
+
+        # Build the LLM clients and structured-output chains once and reuse them on every call
+        self._llm_scenario = ChatGroq(
+            model=settings.TEXT_MODEL_NAME,
+            api_key=settings.GROQ_API_KEY,
+            temperature=0.7,
+            max_retries=2,
+        )
+        self._llm_enhance = ChatGroq(
+            model=settings.TEXT_MODEL_NAME,
+            api_key=settings.GROQ_API_KEY,
+            temperature=0.3,
+            max_retries=2,
+        )
+        self._scenario_chain = IMAGE_SCENARIO_TEMPLATE | self._llm_scenario.with_structured_output(ScenarioPrompt)
+        self._enhance_chain = IMAGE_ENHANCEMENT_TEMPLATE | self._llm_enhance.with_structured_output(EnhancedPrompt)
 
     def _validate_env_vars(self) -> None:
         """Validate that all required environment variables are set."""
@@ -46,17 +68,36 @@ class TextToImage:
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-    async def generate_image(self, prompt: str, output_path: str = "") -> bytes:
-        """Generate an image from a prompt using FREE Pollinations.ai API."""
+    async def warm_up(self) -> None:
+        """Open the pooled connection to Pollinations ahead of the real request."""
+        try:
+            await HTTP.head(self.base_url, timeout=5.0)
+        except httpx.HTTPError as e:
+            self.logger.debug(f"Pollinations warm-up failed: {e}")
+
+    def _is_detailed(self, prompt: str) -> bool:
+        lowered = prompt.lower()
+        return len(prompt) > self.DETAILED_PROMPT_MIN_CHARS and any(k in lowered for k in self.DETAILED_PROMPT_KEYWORDS)
+
+    async def generate_image(self, prompt: str, output_path: str = "", skip_enhance: bool = False) -> bytes:
+        """Generate an image from a prompt using FREE Pollinations.ai API.
+
+        Set skip_enhance for prompts that are already generation-ready (e.g. from create_scenario).
+        """
         if not prompt.strip():
             raise ValueError("Prompt cannot be empty")
 
         try:
             self.logger.info(f"🎨 Generating image for prompt: '{prompt[:100]}...'")
 
-            # Enhance the prompt first
-            enhanced_prompt = await self.enhance_prompt(prompt)
-            self.logger.info(f"✨ Enhanced prompt: '{enhanced_prompt[:100]}...'")
+            # Enhance the prompt first, unless it is already detailed
+            if skip_enhance or self._is_detailed(prompt):
+                enhanced_prompt = prompt
+                self.logger.info("⏭️ Prompt already detailed, skipping enhancement")
+            else:
+                # Get DNS/TLS to Pollinations out of the way while the LLM rewrites the prompt
+                enhanced_prompt, _ = await asyncio.gather(self.enhance_prompt(prompt), self.warm_up())
+                self.logger.info(f"✨ Enhanced prompt: '{enhanced_prompt[:100]}...'")
 
             # Use Pollinations.ai - FREE, no API key needed!
             encoded_prompt = urllib.parse.quote(enhanced_prompt)
@@ -65,19 +106,19 @@ class TextToImage:
             # Add parameters for better quality
             url += "?width=1024&height=768&model=flux&nologo=true"
 
-            # Generate image
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                image_data = response.content
-                self.logger.info(f"✅ Image generated successfully ({len(image_data)} bytes)")
+            # Generate image over the shared pooled client, skipping a fresh TLS handshake per call
+            response = await HTTP.get(url)
+            response.raise_for_status()
+
+            image_data = response.content
+            self.logger.info(f"✅ Image generated successfully ({len(image_data)} bytes)")
 
             # Save if output path provided
             if output_path:
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                with open(output_path, "wb") as f:
-                    f.write(image_data)
+                # Disk I/O runs on a worker thread so the event loop keeps serving other users
+                path = anyio.Path(output_path)
+                await path.parent.mkdir(parents=True, exist_ok=True)
+                await path.write_bytes(image_data)
                 self.logger.info(f"💾 Image saved to {output_path}")
 
             return image_data
@@ -96,24 +137,7 @@ class TextToImage:
 
             self.logger.info("📝 Creating scenario from chat history")
 
-            llm = ChatGroq(
-                model=settings.TEXT_MODEL_NAME,
-                api_key=settings.GROQ_API_KEY,
-                temperature=0.7,
-                max_retries=2,
-            )
-
-            structured_llm = llm.with_structured_output(ScenarioPrompt)
-
-            chain = (
-                PromptTemplate(
-                    input_variables=["chat_history"],
-                    template=IMAGE_SCENARIO_PROMPT,
-                )
-                | structured_llm
-            )
-
-            scenario = await chain.ainvoke({"chat_history": formatted_history})
+            scenario = await self._scenario_chain.ainvoke({"chat_history": formatted_history})
             self.logger.info(f"✅ Created scenario: narrative='{scenario.narrative[:50]}...', prompt='{scenario.image_prompt[:50]}...'")
 
             return scenario
@@ -131,24 +155,7 @@ class TextToImage:
         try:
             self.logger.info(f"✨ Enhancing prompt: '{prompt[:50]}...'")
 
-            llm = ChatGroq(
-                model=settings.TEXT_MODEL_NAME,
-                api_key=settings.GROQ_API_KEY,
-                temperature=0.3,
-                max_retries=2,
-            )
-
-            structured_llm = llm.with_structured_output(EnhancedPrompt)
-
-            chain = (
-                PromptTemplate(
-                    input_variables=["prompt"],
-                    template=IMAGE_ENHANCEMENT_PROMPT,
-                )
-                | structured_llm
-            )
-
-            enhanced = await chain.ainvoke({"prompt": prompt})
+            enhanced = await self._enhance_chain.ainvoke({"prompt": prompt})
             enhanced_prompt = enhanced.content
             self.logger.info(f"✅ Enhanced prompt: '{enhanced_prompt[:100]}...'")
 
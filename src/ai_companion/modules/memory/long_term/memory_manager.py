@@ -1,20 +1,33 @@
 import logging
+import re
 import uuid
 from datetime import datetime
 from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
-from ai_companion.core.prompts import MEMORY_ANALYSIS_PROMPT
+from ai_companion.core.prompts import MEMORY_ANALYSIS_TEMPLATE
 from ai_companion.modules.memory.long_term.vector_store import get_vector_store
 from ai_companion.settings import settings
 from langchain_core.messages import BaseMessage
 from langchain_groq import ChatGroq
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Messages that never carry a memory, filtered out before spending an LLM call on them
+_TRIVIAL = re.compile(r"^(ok|okay|k|yes|yeah|yep|no|nope|thanks?|thx|ty|lol|haha|hi|hey|hello|bye|sure|cool|nice)\W*$", re.I)
+_FIRST_PERSON = re.compile(r"\b(i|i'm|im|my|me|mine)\b", re.I)
+_MIN_LEN = 12
+
+
+def _is_trivial(content: str) -> bool:
+    """Cheap check for acks and short messages that say nothing about the user."""
+    content = content.strip()
+    if _TRIVIAL.match(content):
+        return True
+    # Short messages only count when they talk about the user, e.g. "I'm Sara"
+    return len(content) < _MIN_LEN and not _FIRST_PERSON.search(content)
+
 
 class MemoryAnalysis(BaseModel):
     """Result of analyzing a message for memory-worthy content."""
@@ -41,7 +54,7 @@ class MemoryManager:
 
     async def _analyze_memory(self, message: str) -> MemoryAnalysis:
         """Analyze a message to determine importance and format if needed."""
-        prompt = MEMORY_ANALYSIS_PROMPT.format(message=message)
+        prompt = MEMORY_ANALYSIS_TEMPLATE.format(message=message)
         
         self.logger.info(f"📝 Sending to LLM for analysis...")
         
@@ -76,6 +89,10 @@ class MemoryManager:
             self.logger.warning("⚠️ Empty message content; skipping")
             return
 
+        if _is_trivial(content):
+            self.logger.info(f"⏭️ Skipping trivial message: '{content}'")
+            return
+
         self.logger.info(f"🧠 Analyzing message: '{content}'")
 
         # Analyze the message
@@ -86,9 +103,12 @@ class MemoryManager:
         self.logger.info(f"   - formatted_memory: '{analysis.formatted_memory}'")
         
         if analysis.is_important and analysis.formatted_memory:
+            # Encode the stored text once for both the similarity check and the upsert
+            vector = await self.vector_store.aencode(analysis.formatted_memory)
+
             try:
                 self.logger.info(f"🔍 Checking for similar memories...")
-                similar = self.vector_store.find_similar_memory(analysis.formatted_memory)
+                similar = await self.vector_store.find_similar_memory(analysis.formatted_memory, vector=vector)
                 
                 if similar:
                     self.logger.info(f"🔄 Similar memory found (score: {similar.score}): '{similar.text}'")
@@ -109,12 +129,13 @@ class MemoryManager:
                 self.logger.info(f"💾 STORING NEW MEMORY (ID: {memory_id})")
                 self.logger.info(f"   Text: '{analysis.formatted_memory}'")
                 
-                self.vector_store.store_memory(
+                await self.vector_store.store_memory(
                     text=analysis.formatted_memory,
                     metadata={
                         "id": memory_id,
                         "timestamp": datetime.now().isoformat(),
                     },
+                    vector=vector,
                 )
                 
                 self.logger.info(f"✅ MEMORY STORED SUCCESSFULLY! ID: {memory_id}")
@@ -125,12 +146,12 @@ class MemoryManager:
             self.logger.warning(f"❌ Message NOT important")
             self.logger.warning(f"   - is_important: {analysis.is_important}")
 
-    def get_relevant_memories(self, context: str) -> List[str]:
-        """Retrieve relevant memories based on the current context."""
+    async def get_relevant_memories(self, context: str) -> List[str]:
+        """Retrieve relevant memories based on the current context, most relevant first."""
         self.logger.info(f"🔍 Searching memories for: '{context[:100]}...'")
         
         try:
-            memories = self.vector_store.search_memories(context, k=settings.MEMORY_TOP_K)
+            memories = await self.vector_store.search_memories(context, k=settings.MEMORY_TOP_K)
             self.logger.info(f"📚 Found {len(memories)} relevant memories")
         except Exception as e:
             self.logger.exception(f"❌ Error retrieving memories: {e}")
@@ -149,11 +170,24 @@ class MemoryManager:
         return [getattr(memory, "text", "") for memory in memories]
 
     def format_memories_for_prompt(self, memories: List[str]) -> str:
-        """Format retrieved memories as bullet points for inclusion in prompts."""
+        """Format retrieved memories as bullet points for inclusion in prompts.
+
+        Memories are taken in relevance order until MEMORY_CONTEXT_MAX_CHARS is reached, so the
+        least relevant ones are dropped. The kept lines are then sorted, which keeps the block
+        byte-identical across turns while the same memories are retrieved.
+        """
         if not memories:
             return ""
-        formatted = "\n".join(f"- {m}" for m in memories)
-        self.logger.info(f"📋 Formatted {len(memories)} memories for prompt")
+        lines = []
+        size = 0
+        for memory in memories:
+            line = f"- {' '.join(memory.split())}"
+            if lines and size + len(line) + 1 > settings.MEMORY_CONTEXT_MAX_CHARS:
+                break
+            lines.append(line)
+            size += len(line) + 1
+        formatted = "\n".join(sorted(lines))
+        self.logger.info(f"📋 Formatted {len(lines)} memories for prompt")
         return formatted
 
 
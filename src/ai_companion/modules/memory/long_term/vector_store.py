@@ -1,17 +1,32 @@
 # vector_store.py
-import time
+import asyncio
+import hashlib
 import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from functools import lru_cache
 from typing import List, Optional
 
+import numpy as np
+from grpc import StatusCode
+from grpc.aio import AioRpcError
+
 from ai_companion.settings import settings
 
 # qdrant client
-from qdrant_client import QdrantClient
-from qdrant_client.http.exceptions import ResponseHandlingException
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from qdrant_client.models import (
+    Distance,
+    HnswConfigDiff,
+    PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
 
 # sentence-transformers
 from sentence_transformers import SentenceTransformer
@@ -19,6 +34,20 @@ from sentence_transformers import SentenceTransformer
 logger = logging.getLogger(__name__)
 
 
+def _is_not_found(e: Exception) -> bool:
+    """Whether a REST or gRPC error means the collection does not exist."""
+    if isinstance(e, UnexpectedResponse):
+        return e.status_code == 404
+    return isinstance(e, AioRpcError) and e.code() == StatusCode.NOT_FOUND
+
+
+def _is_unavailable(e: Exception) -> bool:
+    """Whether a REST or gRPC error means Qdrant could not be reached."""
+    if isinstance(e, ResponseHandlingException):
+        return True
+    return isinstance(e, AioRpcError) and e.code() == StatusCode.UNAVAILABLE
+
+
 @dataclass
 class Memory:
     text: str
@@ -39,6 +68,7 @@ class VectorStore:
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
     COLLECTION_NAME = "long_term_memory"
     SIMILARITY_THRESHOLD = 0.9
+    EMBEDDING_CACHE_SIZE = 1024
 
     _instance: Optional["VectorStore"] = None
     _initialized: bool = False
@@ -53,7 +83,11 @@ class VectorStore:
             return
 
         # Load embedding model
-        self.model = SentenceTransformer(self.EMBEDDING_MODEL)
+        self.model = self._load_model()
+        # Repeated texts (retries, duplicate messages, re-checks) skip the forward pass
+        self._encode_cached = lru_cache(maxsize=self.EMBEDDING_CACHE_SIZE)(self._encode_uncached)
+        # Dedicated threads for forward passes so encoding never blocks the event loop
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="embed")
 
         # Validate envs and build client
         self._validate_env_vars()
@@ -63,8 +97,7 @@ class VectorStore:
             host = settings.QDRANT_HOST or "qdrant"
             port = int(settings.QDRANT_PORT or 6333)
             logger.info("Connecting to LOCAL Qdrant at %s:%s", host, port)
-            # QdrantClient(host, port) is fine for local docker
-            self.client = QdrantClient(host=host, port=port)
+            self.client = self._build_client(host=host, port=port)
         else:
             url = settings.QDRANT_URL
             api_key = settings.QDRANT_API_KEY
@@ -72,11 +105,35 @@ class VectorStore:
             if isinstance(api_key, str) and api_key.strip().lower() == "none":
                 api_key = None
             logger.info("Connecting to CLOUD Qdrant at %s", url)
-            # prefer_grpc default can cause issues in some networks, set prefer_grpc=False to use HTTP
-            self.client = QdrantClient(url=url, api_key=api_key, prefer_grpc=False, timeout=60.0)
+            self.client = self._build_client(url=url, api_key=api_key, timeout=60.0)
 
+        # Set once the collection is known to exist, so hot paths skip the get_collections round trip
+        self._collection_ready = False
         self._initialized = True
 
+    @staticmethod
+    def _build_client(**kwargs) -> AsyncQdrantClient:
+        # gRPC has far less per-request overhead than JSON over HTTP for single-point upserts and k=1 searches,
+        # but some networks block it, so QDRANT_PREFER_GRPC=false keeps plain HTTP available
+        return AsyncQdrantClient(
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            **kwargs,
+        )
+
+    def _load_model(self) -> SentenceTransformer:
+        if settings.EMBEDDING_BACKEND == "onnx":
+            try:
+                # Same encode() surface, but int8 ONNX Runtime kernels instead of FP32 PyTorch
+                return SentenceTransformer(
+                    self.EMBEDDING_MODEL,
+                    backend="onnx",
+                    model_kwargs={"file_name": settings.EMBEDDING_ONNX_FILE},
+                )
+            except Exception as e:
+                logger.warning("Could not load quantized ONNX embedding model, falling back to torch: %s", e)
+        return SentenceTransformer(self.EMBEDDING_MODEL)
+
     def _validate_env_vars(self) -> None:
         if settings.USE_LOCAL_QDRANT:
             if not settings.QDRANT_HOST and not settings.QDRANT_PORT and not settings.QDRANT_URL:
@@ -93,60 +150,119 @@ class VectorStore:
             if missing:
                 raise ValueError(f"Missing required cloud Qdrant variables: {', '.join(missing)}")
 
-    def _collection_exists(self) -> bool:
+    async def _collection_exists(self) -> bool:
+        if self._collection_ready:
+            return True
+
         max_retries = 3
         target = settings.QDRANT_HOST if settings.USE_LOCAL_QDRANT else settings.QDRANT_URL
         for attempt in range(1, max_retries + 1):
             try:
-                collections = self.client.get_collections().collections
-                return any(col.name == self.COLLECTION_NAME for col in collections)
-            except ResponseHandlingException as e:
+                collections = (await self.client.get_collections()).collections
+                self._collection_ready = any(col.name == self.COLLECTION_NAME for col in collections)
+                return self._collection_ready
+            except Exception as e:
+                if not _is_unavailable(e):
+                    logger.exception("Unexpected error when checking qdrant collections: %s", e)
+                    return False
                 logger.warning(
                     "Attempt %d/%d: could not reach Qdrant (%s). Retrying in %ds... (%s)",
                     attempt, max_retries, target, attempt * 2, e,
                 )
-                time.sleep(attempt * 2)
-            except Exception as e:
-                logger.exception("Unexpected error when checking qdrant collections: %s", e)
-                return False
+                await asyncio.sleep(attempt * 2)
         logger.error("Failed to contact Qdrant after %d attempts; treating collection as missing.", max_retries)
         return False
 
-    def _create_collection(self) -> None:
+    async def _create_collection(self) -> None:
         try:
-            sample_embedding = self.model.encode("sample text")
-            dim = len(sample_embedding) if hasattr(sample_embedding, "__len__") else len(list(sample_embedding))
-            self.client.create_collection(
+            dim = len(await self.aencode("sample text"))
+            await self.client.create_collection(
                 collection_name=self.COLLECTION_NAME,
-                vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+                # Full-precision vectors live on disk; int8 copies stay in RAM for HNSW traversal
+                vectors_config=VectorParams(size=dim, distance=Distance.COSINE, on_disk=True),
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True),
+                ),
+                hnsw_config=HnswConfigDiff(m=16, ef_construct=128),
             )
+            self._collection_ready = True
             logger.info("Created qdrant collection: %s", self.COLLECTION_NAME)
         except Exception as e:
             logger.exception("Failed to create qdrant collection: %s", e)
             raise
 
-    def find_similar_memory(self, text: str) -> Optional[Memory]:
-        results = self.search_memories(text, k=1)
-        if results and results[0].score is not None and results[0].score >= self.SIMILARITY_THRESHOLD:
-            return results[0]
-        return None
+    def _encode_uncached(self, text: str) -> np.ndarray:
+        # float32 arrays go to Qdrant as-is, without boxing every component into a Python float
+        embedding = np.asarray(self.model.encode(text, normalize_embeddings=True), dtype=np.float32)
+        # The LRU cache keeps this array for every later caller, so make it immutable
+        embedding.flags.writeable = False
+        return embedding
+
+    def _encode(self, text: str) -> np.ndarray:
+        # Callers get their own writable copy: Qdrant's local mode normalizes query vectors in place
+        return self._encode_cached(text).copy()
+
+    async def aencode(self, text: str) -> np.ndarray:
+        """Embed text on the encoder thread pool without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._pool, self._encode, text)
 
-    def store_memory(self, text: str, metadata: dict) -> None:
-        if not self._collection_exists():
+    async def find_similar_memory(self, text: str, vector: Optional[np.ndarray] = None) -> Optional[Memory]:
+        if not await self._collection_exists():
+            return None
+
+        try:
+            # Let Qdrant drop anything under the threshold during traversal instead of filtering here
+            response = await self.client.query_points(
+                collection_name=self.COLLECTION_NAME,
+                query=vector if vector is not None else await self.aencode(text),
+                limit=1,
+                score_threshold=self.SIMILARITY_THRESHOLD,
+                with_payload=True,
+            )
+        except Exception as e:
+            if _is_not_found(e):
+                self._collection_ready = False
+            else:
+                logger.exception("Error while searching qdrant: %s", e)
+            return None
+
+        return self._to_memory(response.points[0]) if response.points else None
+
+    @staticmethod
+    def _stable_id(text: str) -> str:
+        # 128-bit content hash as a UUID: same text, same point across restarts (hash() is salted per process)
+        return str(uuid.UUID(bytes=hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()))
+
+    async def _upsert(self, points: List[PointStruct]) -> None:
+        try:
+            await self.client.upsert(collection_name=self.COLLECTION_NAME, points=points)
+        except Exception as e:
+            if not _is_not_found(e):
+                raise
+            # The collection was dropped behind our back; recreate it and retry once
+            logger.info("Collection '%s' not found. Creating it...", self.COLLECTION_NAME)
+            self._collection_ready = False
+            await self._create_collection()
+            await self.client.upsert(collection_name=self.COLLECTION_NAME, points=points)
+
+    async def store_memory(self, text: str, metadata: dict, vector: Optional[np.ndarray] = None) -> None:
+        if not await self._collection_exists():
             try:
                 logger.info("Collection '%s' not found. Creating it...", self.COLLECTION_NAME)
-                self._create_collection()
+                await self._create_collection()
             except Exception:
                 logger.error("Could not create collection; skipping memory storage.")
                 return
 
-        similar_memory = self.find_similar_memory(text)
+        # Encode once and reuse it for both the duplicate check and the upsert
+        if vector is None:
+            vector = await self.aencode(text)
+
+        similar_memory = await self.find_similar_memory(text, vector=vector)
         if similar_memory and similar_memory.id:
             metadata["id"] = similar_memory.id
 
-        embedding = self.model.encode(text)
-        vector = embedding.tolist() if hasattr(embedding, "tolist") else list(map(float, embedding))
-        point_id = metadata.get("id", str(abs(hash(text))))
+        point_id = metadata.get("id") or self._stable_id(text)
 
         point = PointStruct(
             id=point_id,
@@ -155,32 +271,35 @@ class VectorStore:
         )
 
         try:
-            self.client.upsert(collection_name=self.COLLECTION_NAME, points=[point])
+            await self._upsert([point])
             logger.debug("Stored/updated memory id=%s", point_id)
         except Exception as e:
             logger.exception("Failed to upsert point into qdrant: %s", e)
 
-    def search_memories(self, query: str, k: int = 5) -> List[Memory]:
-        if not self._collection_exists():
+    async def search_memories(self, query: str, k: int = 5, vector: Optional[np.ndarray] = None) -> List[Memory]:
+        if not await self._collection_exists():
             logger.debug("Collection does not exist or Qdrant unreachable; returning empty results.")
             return []
 
         try:
-            query_embedding = self.model.encode(query)
-            qvec = query_embedding.tolist() if hasattr(query_embedding, "tolist") else list(map(float, query_embedding))
-            results = self.client.search(collection_name=self.COLLECTION_NAME, query_vector=qvec, limit=k)
+            qvec = vector if vector is not None else await self.aencode(query)
+            results = await self.client.search(collection_name=self.COLLECTION_NAME, query_vector=qvec, limit=k)
         except Exception as e:
-            logger.exception("Error while searching qdrant: %s", e)
+            if _is_not_found(e):
+                self._collection_ready = False
+            else:
+                logger.exception("Error while searching qdrant: %s", e)
             return []
 
-        return [
-            Memory(
-                text=hit.payload.get("text", ""),
-                metadata={k: v for k, v in hit.payload.items() if k != "text"},
-                score=getattr(hit, "score", None),
-            )
-            for hit in results
-        ]
+        return [self._to_memory(hit) for hit in results]
+
+    @staticmethod
+    def _to_memory(hit) -> Memory:
+        return Memory(
+            text=hit.payload.get("text", ""),
+            metadata={k: v for k, v in hit.payload.items() if k != "text"},
+            score=getattr(hit, "score", None),
+        )
 
 
 @lru_cache
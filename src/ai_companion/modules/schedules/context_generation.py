@@ -1,5 +1,6 @@
-from datetime import datetime
-from typing import Dict, Optional
+from bisect import bisect_right
+from datetime import datetime, time
+from typing import Dict, NamedTuple, Optional, Tuple
 
 from ai_companion.core.schedules import (
     FRIDAY_SCHEDULE,
@@ -11,6 +12,41 @@ from ai_companion.core.schedules import (
     WEDNESDAY_SCHEDULE,
 )
 
+MINUTES_PER_DAY = 24 * 60
+
+
+class CompiledSchedule(NamedTuple):
+    """A day's schedule as sorted, parallel minute-of-day intervals."""
+
+    starts: Tuple[int, ...]
+    ends: Tuple[int, ...]
+    activities: Tuple[str, ...]
+
+
+def _to_minutes(value: str) -> int:
+    """Convert an 'HH:MM' string into minutes since midnight."""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _compile(schedule: Dict[str, str]) -> CompiledSchedule:
+    """Parse a schedule's 'HH:MM-HH:MM' keys once into bisectable intervals."""
+    slots = []
+    for time_range, activity in schedule.items():
+        start_str, end_str = time_range.split("-")
+        start, end = _to_minutes(start_str), _to_minutes(end_str)
+
+        # Split overnight activities (e.g., 23:00-06:00) at midnight
+        if start > end:
+            slots.append((start, MINUTES_PER_DAY, activity))
+            slots.append((0, end, activity))
+        else:
+            slots.append((start, end, activity))
+
+    slots.sort(key=lambda slot: slot[0])
+    starts, ends, activities = zip(*slots) if slots else ((), (), ())
+    return CompiledSchedule(tuple(starts), tuple(ends), tuple(activities))
+
 
 class ScheduleContextGenerator:
     """Class to generate context about Muzz's current activity based on schedules."""
@@ -25,13 +61,7 @@ class ScheduleContextGenerator:
         6: SUNDAY_SCHEDULE,  # Sunday
     }
 
-    @staticmethod
-    def _parse_time_range(time_range: str) -> tuple[datetime.time, datetime.time]:
-        """Parse a time range string (e.g., '06:00-07:00') into start and end times."""
-        start_str, end_str = time_range.split("-")
-        start_time = datetime.strptime(start_str, "%H:%M").time()
-        end_time = datetime.strptime(end_str, "%H:%M").time()
-        return start_time, end_time
+    COMPILED_SCHEDULES = {day: _compile(schedule) for day, schedule in SCHEDULES.items()}
 
     @classmethod
     def get_current_activity(cls) -> Optional[str]:
@@ -42,23 +72,28 @@ class ScheduleContextGenerator:
         """
         # Get current time and day of week (0 = Monday, 6 = Sunday)
         current_datetime = datetime.now()
-        current_time = current_datetime.time()
-        current_day = current_datetime.weekday()
-
-        # Get schedule for current day
-        schedule = cls.SCHEDULES.get(current_day, {})
-
-        # Find matching time slot
-        for time_range, activity in schedule.items():
-            start_time, end_time = cls._parse_time_range(time_range)
-
-            # Handle overnight activities (e.g., 23:00-06:00)
-            if start_time > end_time:
-                if current_time >= start_time or current_time <= end_time:
-                    return activity
-            else:
-                if start_time <= current_time <= end_time:
-                    return activity
+        return cls.get_activity_at(current_datetime.weekday(), current_datetime.time())
+
+    @classmethod
+    def get_activity_at(cls, day: int, at: time) -> Optional[str]:
+        """Get Muzz's activity for a given day of the week and time of day.
+
+        Args:
+            day: Day of week as integer (0 = Monday, 6 = Sunday)
+            at: Time of day to look up
+
+        Returns:
+            str: Description of the activity, or None if no matching time slot is found
+        """
+        compiled = cls.COMPILED_SCHEDULES.get(day)
+        if compiled is None:
+            return None
+
+        # Latest slot starting at or before the given minute
+        minute = at.hour * 60 + at.minute
+        index = bisect_right(compiled.starts, minute) - 1
+        if index >= 0 and minute <= compiled.ends[index]:
+            return compiled.activities[index]
 
         return None
 
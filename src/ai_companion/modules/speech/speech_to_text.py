@@ -3,8 +3,9 @@ import tempfile
 from typing import Optional
 
 from ai_companion.core.exceptions import SpeechToTextError
+from ai_companion.core.http import HTTP
 from ai_companion.settings import settings
-from groq import Groq
+from groq import AsyncGroq
 
 
 class SpeechToText:
@@ -16,7 +17,7 @@ class SpeechToText:
     def __init__(self):
         """Initialize the SpeechToText class and validate environment variables."""
         self._validate_env_vars()
-        self._client: Optional[Groq] = None
+        self._client: Optional[AsyncGroq] = None
 
     def _validate_env_vars(self) -> None:
         """Validate that all required environment variables are set."""
@@ -25,10 +26,10 @@ class SpeechToText:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
     @property
-    def client(self) -> Groq:
+    def client(self) -> AsyncGroq:
         """Get or create Groq client instance using singleton pattern."""
         if self._client is None:
-            self._client = Groq(api_key=settings.GROQ_API_KEY)
+            self._client = AsyncGroq(api_key=settings.GROQ_API_KEY, http_client=HTTP)
         return self._client
 
     async def transcribe(self, audio_data: bytes) -> str:
@@ -56,7 +57,7 @@ class SpeechToText:
             try:
                 # Open the temporary file for the API request
                 with open(temp_file_path, "rb") as audio_file:
-                    transcription = self.client.audio.transcriptions.create(
+                    transcription = await self.client.audio.transcriptions.create(
                         file=audio_file,
                         model="whisper-large-v3-turbo",
                         language="en",
@@ -2,8 +2,9 @@ import os
 from typing import Optional
 
 from ai_companion.core.exceptions import TextToSpeechError
+from ai_companion.core.http import HTTP
 from ai_companion.settings import settings
-from elevenlabs import ElevenLabs, Voice, VoiceSettings
+from elevenlabs import AsyncElevenLabs, Voice, VoiceSettings
 
 
 class TextToSpeech:
@@ -15,7 +16,7 @@ class TextToSpeech:
     def __init__(self):
         """Initialize the TextToSpeech class and validate environment variables."""
         self._validate_env_vars()
-        self._client: Optional[ElevenLabs] = None
+        self._client: Optional[AsyncElevenLabs] = None
 
     def _validate_env_vars(self) -> None:
         """Validate that all required environment variables are set."""
@@ -24,10 +25,10 @@ class TextToSpeech:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
     @property
-    def client(self) -> ElevenLabs:
+    def client(self) -> AsyncElevenLabs:
         """Get or create ElevenLabs client instance using singleton pattern."""
         if self._client is None:
-            self._client = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
+            self._client = AsyncElevenLabs(api_key=settings.ELEVENLABS_API_KEY, httpx_client=HTTP)
         return self._client
 
     async def synthesize(self, text: str) -> bytes:
@@ -50,7 +51,7 @@ class TextToSpeech:
             raise ValueError("Input text exceeds maximum length of 5000 characters")
 
         try:
-            audio_generator = self.client.generate(
+            audio_generator = await self.client.generate(
                 text=text,
                 voice=Voice(
                     voice_id=settings.ELEVENLABS_VOICE_ID,
@@ -60,7 +61,7 @@ class TextToSpeech:
             )
 
             # Convert generator to bytes
-            audio_bytes = b"".join(audio_generator)
+            audio_bytes = b"".join([chunk async for chunk in audio_generator])
             if not audio_bytes:
                 raise TextToSpeechError("Generated audio is empty")
 
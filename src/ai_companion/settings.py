@@ -12,9 +12,16 @@ class Settings(BaseSettings):
     QDRANT_API_KEY: str | None = None
     QDRANT_URL: str | None = None
     QDRANT_PORT: str = "6333"
+    QDRANT_GRPC_PORT: int = 6334
+    # Set QDRANT_PREFER_GRPC=false on networks where gRPC is blocked to fall back to HTTP
+    QDRANT_PREFER_GRPC: bool = True
     QDRANT_HOST: str | None = None
     USE_LOCAL_QDRANT: bool = False
 
+    # int8-quantized ONNX export shipped in the all-MiniLM-L6-v2 repo; set EMBEDDING_BACKEND=torch to opt out
+    EMBEDDING_BACKEND: str = "onnx"
+    EMBEDDING_ONNX_FILE: str = "onnx/model_quint8_avx2.onnx"
+
     TEXT_MODEL_NAME: str = "llama-3.3-70b-versatile"
     SMALL_TEXT_MODEL_NAME: str = "llama-3.1-8b-instant"  # ✅ Fixed from gemma2-9b-it
     STT_MODEL_NAME: str = "whisper-large-v3-turbo"
@@ -23,10 +30,19 @@ class Settings(BaseSettings):
     ITT_MODEL_NAME: str = "meta-llama/llama-4-scout-17b-16e-instruct"
 
     MEMORY_TOP_K: int = 3
+    MEMORY_CONTEXT_MAX_CHARS: int = 1000
     ROUTER_MESSAGES_TO_ANALYZE: int = 3
     TOTAL_MESSAGES_SUMMARY_TRIGGER: int = 20
     TOTAL_MESSAGES_AFTER_SUMMARY: int = 5
 
+    ROUTER_CACHE_THRESHOLD: float = 0.92
+    ROUTER_CACHE_MAX_ENTRIES: int = 2048
+    ROUTER_CACHE_MIN_WORDS: int = 4
+    ROUTER_CACHE_SAVE_EVERY: int = 32
+    VISION_CACHE_TTL: int = 24 * 60 * 60
+    VISION_CACHE_MAX_ENTRIES: int = 256
+
     SHORT_TERM_MEMORY_DB_PATH: str = "/app/data/memory.db"
+    SEMANTIC_CACHE_PATH: str = "/app/data/router_cache.npz"
 
 settings = Settings()
\ No newline at end of file